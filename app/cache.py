@@ -0,0 +1,96 @@
+"""
+Caché en memoria para los listados de la API.
+Guarda por un tiempo corto (TTL) el resultado de los endpoints de listado y se
+vacía cada vez que una sesión confirma cambios en la base de datos.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from sqlalchemy import event
+from sqlmodel import Session
+
+from .config import get_settings
+
+# Obtener configuración
+settings = get_settings()
+
+
+class CacheTTL:
+    """
+    Caché LRU con expiración, segura para los hilos del threadpool.
+
+    Es local a cada proceso: con varios workers de uvicorn cada uno tiene la
+    suya, y el TTL limita cuánto tiempo puede servir datos desactualizados.
+
+    `generacion` aumenta con cada clear(). obtener() la lee antes de calcular
+    el valor y se la pasa a set(): si hubo una escritura mientras tanto, el
+    resultado puede ser anterior a ella y no se guarda.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._datos: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.generacion = 0
+
+    def get(self, clave: Hashable) -> Any | None:
+        """Retorna el valor guardado o None si no existe o ya expiró."""
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            expira, valor = entrada
+            if expira < time.monotonic():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave: Hashable, valor: Any, generacion: int) -> None:
+        """
+        Guarda un valor calculado en la generación indicada; no hace nada si la
+        caché se vació después. Con TTL 0 la caché queda desactivada.
+        """
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if generacion != self.generacion:
+                return
+            self._datos[clave] = (time.monotonic() + self.ttl, valor)
+            self._datos.move_to_end(clave)
+            if len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    def obtener(self, clave: Hashable, calcular: Callable[[], Any]) -> Any:
+        """
+        Retorna el valor guardado en `clave` o, si no existe o ya expiró, lo
+        calcula con `calcular()` y lo guarda.
+        """
+        valor = self.get(clave)
+        if valor is None:
+            generacion = self.generacion
+            valor = calcular()
+            self.set(clave, valor, generacion)
+        return valor
+
+    def clear(self) -> None:
+        """Elimina todas las entradas."""
+        with self._lock:
+            self._datos.clear()
+            self.generacion += 1
+
+
+# Una sola caché para todos los listados: los favoritos incluyen los datos del
+# usuario y de la canción, así que cualquier escritura puede afectar a todos
+listados_cache = CacheTTL(settings.list_cache_ttl)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_listados(_session):
+    """Vacía la caché de listados cuando una sesión confirma cambios."""
+    listados_cache.clear()
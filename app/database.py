@@ -3,10 +3,14 @@ Configuración y manejo de la base de datos.
 Maneja la conexión a SQLite/PostgreSQL usando SQLModel y SQLAlchemy.
 """
 
+import sqlite3
 from collections.abc import Generator
 
+from sqlalchemy import event, text
 from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
 
 from .config import get_settings
 
@@ -16,17 +20,66 @@ settings = get_settings()
 # Crear el engine de la base de datos
 # Para SQLite: connect_args={"check_same_thread": False} permite múltiples hilos
 # Para PostgreSQL, esto no es necesario
-connect_args = (
-    {"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
-)
+is_sqlite = settings.database_url.startswith("sqlite")
+connect_args = {"check_same_thread": False} if is_sqlite else {}
+
+if is_sqlite:
+    # SQLite no usa un pool de conexiones de red; una base de datos en memoria
+    # debe compartir una única conexión para que todas las sesiones la vean
+    pool_args: dict = (
+        {"poolclass": StaticPool} if ":memory:" in settings.database_url else {}
+    )
+else:
+    # Dimensionar el pool para soportar muchas peticiones concurrentes
+    pool_args = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
 
 engine: Engine = create_engine(
     settings.database_url,
     connect_args=connect_args,
-    echo=settings.debug,  # Mostrar SQL queries en debug mode
+    echo=settings.sql_echo,  # Mostrar SQL queries solo si se solicita
+    **pool_args,
 )
 
 
+@event.listens_for(Engine, "connect")
+def _activar_foreign_keys_sqlite(dbapi_connection, _connection_record):
+    """
+    Activa las llaves foráneas en cada conexión SQLite.
+    SQLite no las aplica por defecto, y sin ellas no funciona ON DELETE CASCADE.
+    """
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+def configurar_sqlite(dbapi_connection, _connection_record):
+    """
+    Ajusta una conexión a un archivo SQLite para escribir más rápido.
+    Con WAL cada commit escribe solo en el log (sin reescribir la BD), y
+    synchronous=NORMAL sigue siendo seguro ante caídas en modo WAL.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-64000")  # 64 MB
+    cursor.close()
+
+
+# WAL no aplica a las bases de datos en memoria. Se puede desactivar con
+# SQLITE_WAL=false (p. ej. si la BD está en un sistema de archivos de red,
+# donde WAL no funciona)
+if is_sqlite and settings.sqlite_wal and ":memory:" not in settings.database_url:
+    event.listen(engine, "connect", configurar_sqlite)
+
+
 def create_db_and_tables():
     """
     Crear todas las tablas en la base de datos.
@@ -40,53 +93,88 @@ def get_session() -> Generator[Session, None, None]:
     Dependency para obtener una sesión de base de datos.
     Se usa como dependencia en los endpoints de FastAPI.
 
+    Los objetos no se expiran al hacer commit: los valores generados por la
+    base de datos (id, fechas) ya llegan con el INSERT ... RETURNING, así que
+    no hace falta un SELECT extra para leerlos al armar la respuesta.
+
     Yields:
         Session: Sesión de base de datos SQLModel
     """
-    with Session(engine) as session:
+    with Session(engine, expire_on_commit=False) as session:
         yield session
 
 
+# Engine en memoria para testing, creado la primera vez que se necesita
+_test_engine: Engine | None = None
+
+
+def _get_test_engine() -> Engine:
+    """
+    Retorna el engine en memoria para testing.
+    Las tablas se crean solo al construir el engine, no en cada sesión.
+    """
+    global _test_engine
+    if _test_engine is None:
+        _test_engine = create_engine(
+            "sqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        SQLModel.metadata.create_all(_test_engine)
+    return _test_engine
+
+
 def get_test_session() -> Generator[Session, None, None]:
     """
     Sesión especial para testing.
-    Crea un engine en memoria para pruebas.
+    Usa un engine en memoria compartido entre llamadas.
     """
-    from sqlmodel import create_engine
-    from sqlmodel.pool import StaticPool
+    with Session(_get_test_engine(), expire_on_commit=False) as session:
+        yield session
 
-    test_engine = create_engine(
-        "sqlite:///:memory:",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
 
+def reset_test_db():
+    """
+    Elimina y vuelve a crear las tablas de la base de datos de testing.
+    Útil para los tests que necesitan partir de una base de datos vacía.
+    """
+    test_engine = _get_test_engine()
+    SQLModel.metadata.drop_all(test_engine)
     SQLModel.metadata.create_all(test_engine)
 
-    with Session(test_engine) as session:
-        yield session
-
 
 # Función de utilidad para verificar la conexión
 def check_database_connection() -> bool:
     """
     Verifica si la conexión a la base de datos está funcionando.
 
+    Usa directamente una conexión del pool, sin el costo de crear una Session.
+
     Returns:
         bool: True si la conexión es exitosa, False en caso contrario
     """
     try:
-        from sqlalchemy import text
-
-        with Session(engine) as session:
+        with engine.connect() as connection:
             # Ejecutar una query simple para verificar la conexión
-            session.exec(text("SELECT 1")).first()  # type: ignore
+            connection.execute(text("SELECT 1"))
             return True
     except Exception as e:
         print(f"Error de conexión a la base de datos: {e}")
         return False
 
 
+def get_pool_checkedout() -> int | None:
+    """
+    Retorna el número de conexiones del pool que están en uso.
+
+    Returns:
+        int | None: Conexiones en uso, o None si el pool no lleva la cuenta
+    """
+    if isinstance(engine.pool, QueuePool):
+        return engine.pool.checkedout()
+    return None
+
+
 # Función para limpiar la base de datos (útil para testing)
 def clear_database():
     """
@@ -6,6 +6,7 @@ Define las entidades Usuario, Cancion y Favorito con validaciones Pydantic.
 from datetime import datetime
 
 from pydantic import EmailStr, field_validator
+from sqlalchemy import DDL, Column, DateTime, Index, UniqueConstraint, event, func
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -22,12 +23,18 @@ class Usuario(UsuarioBase, table=True):
     """Modelo de tabla Usuario en la base de datos."""
 
     id: int | None = Field(default=None, primary_key=True)
-    fecha_registro: datetime = Field(
-        default_factory=datetime.utcnow, description="Fecha de registro del usuario"
+    fecha_registro: datetime | None = Field(
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True), server_default=func.now(), nullable=False
+        ),
+        description="Fecha de registro del usuario",
     )
 
-    # Relación con favoritos
-    favoritos: list["Favorito"] = Relationship(back_populates="usuario")
+    # Relación con favoritos (la base de datos los elimina en cascada)
+    favoritos: list["Favorito"] = Relationship(
+        back_populates="usuario", passive_deletes=True
+    )
 
 
 class UsuarioCreate(UsuarioBase):
@@ -63,7 +70,7 @@ class CancionBase(SQLModel):
     duracion: int = Field(
         gt=0, lt=3600, description="Duración en segundos (máximo 1 hora)"
     )
-    año: int = Field(ge=1900, le=2100, description="Año de lanzamiento")
+    año: int = Field(ge=1900, le=2100, index=True, description="Año de lanzamiento")
     genero: str = Field(min_length=1, max_length=50, description="Género musical")
 
     @field_validator("año")
@@ -80,12 +87,43 @@ class Cancion(CancionBase, table=True):
     """Modelo de tabla Cancion en la base de datos."""
 
     id: int | None = Field(default=None, primary_key=True)
-    fecha_creacion: datetime = Field(
-        default_factory=datetime.utcnow, description="Fecha de creación del registro"
+    fecha_creacion: datetime | None = Field(
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True), server_default=func.now(), nullable=False
+        ),
+        description="Fecha de creación del registro",
+    )
+
+    # Relación con favoritos (la base de datos los elimina en cascada)
+    favoritos: list["Favorito"] = Relationship(
+        back_populates="cancion", passive_deletes=True
     )
 
-    # Relación con favoritos
-    favoritos: list["Favorito"] = Relationship(back_populates="cancion")
+
+# Índices de búsqueda de canciones:
+# - genero se compara sin distinguir mayúsculas, con un índice sobre lower(genero)
+# - titulo y artista se buscan por subcadena, que un índice B-tree no acelera;
+#   en PostgreSQL un índice trigram (extensión pg_trgm) sí sirve con
+#   ILIKE '%texto%'. La extensión se crea antes que las tablas.
+event.listen(
+    SQLModel.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+Index("ix_cancion_genero_lower", func.lower(Cancion.genero))
+Index(
+    "ix_cancion_titulo_trgm",
+    Cancion.titulo,
+    postgresql_using="gin",
+    postgresql_ops={"titulo": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_cancion_artista_trgm",
+    Cancion.artista,
+    postgresql_using="gin",
+    postgresql_ops={"artista": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
 
 
 class CancionCreate(CancionBase):
@@ -127,16 +165,29 @@ class CancionUpdate(SQLModel):
 class FavoritoBase(SQLModel):
     """Modelo base para Favorito con campos comunes."""
 
-    id_usuario: int = Field(foreign_key="usuario.id", description="ID del usuario")
-    id_cancion: int = Field(foreign_key="cancion.id", description="ID de la canción")
+    id_usuario: int = Field(
+        foreign_key="usuario.id", ondelete="CASCADE", description="ID del usuario"
+    )
+    id_cancion: int = Field(
+        foreign_key="cancion.id", ondelete="CASCADE", description="ID de la canción"
+    )
 
 
 class Favorito(FavoritoBase, table=True):
     """Modelo de tabla Favorito en la base de datos."""
 
+    # Un usuario solo puede marcar una misma canción como favorita una vez.
+    # La restricción crea además el índice compuesto usado para buscar favoritos.
+    __table_args__ = (
+        UniqueConstraint("id_usuario", "id_cancion", name="uq_fav_usr_cancion"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
-    fecha_marcado: datetime = Field(
-        default_factory=datetime.utcnow,
+    fecha_marcado: datetime | None = Field(
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True), server_default=func.now(), nullable=False
+        ),
         description="Fecha en que se marcó como favorito",
     )
 
@@ -189,11 +240,3 @@ class BusquedaCancion(SQLModel):
     artista: str | None = Field(default=None, description="Buscar por artista")
     genero: str | None = Field(default=None, description="Buscar por género")
     año: int | None = Field(default=None, description="Buscar por año")
-
-
-# Actualizar referencias forward de SQLModel
-UsuarioRead.model_rebuild()
-CancionRead.model_rebuild()
-FavoritoRead.model_rebuild()
-UsuarioConFavoritos.model_rebuild()
-CancionConFavoritos.model_rebuild()
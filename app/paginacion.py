@@ -0,0 +1,44 @@
+"""
+Paginación compartida por los endpoints de listado.
+Admite paginación por offset (skip) y por cursor (after_id) sobre la llave
+primaria.
+"""
+
+from typing import Any
+
+from fastapi import Response
+from pydantic import BaseModel
+from sqlmodel import Session, SQLModel
+from sqlmodel.sql.expression import SelectOfScalar
+
+
+def paginar(
+    session: Session,
+    query: SelectOfScalar[Any],
+    modelo: type[SQLModel],
+    modelo_read: type[BaseModel],
+    skip: int,
+    limit: int,
+    after_id: int | None,
+) -> list[Any]:
+    """
+    Ejecuta `query` con la paginación pedida y convierte las filas a
+    `modelo_read`, para que el resultado se pueda guardar en la caché sin
+    depender de la sesión.
+    """
+    if after_id is not None:
+        # Paginación por cursor: recorre el índice de la llave primaria en lugar
+        # de leer y descartar `skip` filas
+        query = query.where(modelo.id > after_id).order_by(modelo.id)  # type: ignore
+    else:
+        query = query.offset(skip)
+
+    return [
+        modelo_read.model_validate(fila) for fila in session.exec(query.limit(limit))
+    ]
+
+
+def agregar_cursor(response: Response, filas: list[Any], after_id: int | None):
+    """Agrega el header X-Next-Cursor con el ID de la última fila de la página."""
+    if after_id is not None and filas:
+        response.headers["X-Next-Cursor"] = str(filas[-1].id)
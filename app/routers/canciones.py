@@ -3,30 +3,53 @@ Router para endpoints de canciones.
 Maneja CRUD completo de canciones: crear, leer, actualizar, eliminar, buscar.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlmodel import Session, and_, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import delete
+from sqlmodel import Session, and_, func, select
 
+from ..cache import listados_cache
 from ..database import get_session
 from ..models import Cancion, CancionCreate, CancionRead, CancionUpdate
+from ..paginacion import agregar_cursor, paginar
 
 router = APIRouter()
 
+# Query base reutilizada por los listados; cada petición construye una copia
+# con sus filtros y paginación (los Select de SQLAlchemy son inmutables)
+_SELECT_CANCIONES = select(Cancion)
+
 
 @router.get("/", response_model=list[CancionRead])
 def listar_canciones(
-    *, session: Session = Depends(get_session), skip: int = 0, limit: int = 100
+    *,
+    session: Session = Depends(get_session),
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: int | None = None,
 ):
     """
     Listar todas las canciones con paginación.
 
     - **skip**: número de registros a saltar (para paginación)
     - **limit**: máximo número de registros a retornar (máximo 100)
+    - **after_id**: paginación por cursor; retorna las canciones con ID mayor a
+      este valor (en lugar de usar skip). El header X-Next-Cursor trae el
+      valor a usar para la siguiente página.
     """
     # Validar parámetros de paginación
     if limit > 100:
         limit = 100
 
-    canciones = session.exec(select(Cancion).offset(skip).limit(limit)).all()
+    # Los listados repetidos se sirven desde la caché hasta que expiran o hasta
+    # la siguiente escritura en la base de datos
+    canciones = listados_cache.obtener(
+        ("canciones", skip, limit, after_id),
+        lambda: paginar(
+            session, _SELECT_CANCIONES, Cancion, CancionRead, skip, limit, after_id
+        ),
+    )
+    agregar_cursor(response, canciones, after_id)
 
     return canciones
 
@@ -46,7 +69,6 @@ def crear_cancion(*, session: Session = Depends(get_session), cancion: CancionCr
     db_cancion = Cancion.model_validate(cancion)
     session.add(db_cancion)
     session.commit()
-    session.refresh(db_cancion)
     return db_cancion
 
 
@@ -65,14 +87,15 @@ def buscar_canciones(
     Buscar canciones por diferentes criterios.
 
     Puede buscar por título, artista, género y/o año.
-    La búsqueda en texto es parcial (case-insensitive).
+    La búsqueda por título y artista es parcial (case-insensitive);
+    el género debe coincidir completo (case-insensitive).
     """
     # Validar parámetros de paginación
     if limit > 100:
         limit = 100
 
     # Construir query base
-    query = select(Cancion)
+    query = _SELECT_CANCIONES
 
     # Aplicar filtros dinámicamente
     conditions = []
@@ -84,7 +107,9 @@ def buscar_canciones(
         conditions.append(Cancion.artista.ilike(f"%{artista}%"))  # type: ignore
 
     if genero:
-        conditions.append(Cancion.genero.ilike(f"%{genero}%"))  # type: ignore
+        # El género es un valor corto tipo categoría: coincidencia exacta sin
+        # distinguir mayúsculas, que puede usar el índice sobre lower(genero)
+        conditions.append(func.lower(Cancion.genero) == genero.lower())
 
     if año:
         conditions.append(Cancion.año == año)
@@ -132,12 +157,8 @@ def actualizar_cancion(
         )
 
     # Actualizar solo los campos proporcionados
-    cancion_data = cancion_update.model_dump(exclude_unset=True)
-
-    for field, value in cancion_data.items():
-        setattr(cancion, field, value)
-
-    session.add(cancion)
+    # (la canción ya está en la sesión desde session.get, no hace falta add)
+    cancion.sqlmodel_update(cancion_update.model_dump(exclude_unset=True))
     session.commit()
     session.refresh(cancion)
     return cancion
@@ -150,11 +171,13 @@ def eliminar_cancion(*, session: Session = Depends(get_session), cancion_id: int
 
     También eliminará todos los favoritos asociados a esta canción.
     """
-    cancion = session.get(Cancion, cancion_id)
-    if not cancion:
+    # Un solo DELETE; la base de datos elimina los favoritos con ON DELETE CASCADE
+    statement = delete(Cancion).where(Cancion.id == cancion_id)  # type: ignore
+    result = session.exec(statement)
+    if result.rowcount == 0:
+        session.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Canción no encontrada"
         )
 
-    session.delete(cancion)
     session.commit()
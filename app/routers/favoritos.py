@@ -3,30 +3,128 @@ Router para endpoints de favoritos.
 Maneja la gestión de canciones favoritas de usuarios.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, and_, select
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import bindparam, delete, exists
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
 
+from ..cache import listados_cache
 from ..database import get_session
 from ..models import Cancion, Favorito, FavoritoCreate, FavoritoRead, Usuario
+from ..paginacion import agregar_cursor, paginar
 
 router = APIRouter()
 
+# Queries base construidas una sola vez; cada petición construye una copia
+# con su paginación o le pasa sus parámetros (los Select son inmutables)
+_SELECT_FAVORITOS = select(Favorito).options(
+    selectinload(Favorito.usuario),  # type: ignore
+    selectinload(Favorito.cancion),  # type: ignore
+)
+
+# Existencia del usuario y de la canción en una sola query
+_SELECT_EXISTEN_USUARIO_CANCION = select(
+    exists().where(Usuario.id == bindparam("id_usuario")),  # type: ignore
+    exists().where(Cancion.id == bindparam("id_cancion")),  # type: ignore
+)
+_DELETE_FAVORITO_USUARIO_CANCION = delete(Favorito).where(
+    Favorito.id_usuario == bindparam("id_usuario"),  # type: ignore
+    Favorito.id_cancion == bindparam("id_cancion"),  # type: ignore
+)
+
+
+def _crear_favorito(session: Session, id_usuario: int, id_cancion: int) -> Favorito:
+    """
+    Crea un favorito verificando que el usuario y la canción existan.
+    Los duplicados los rechaza la restricción única de la base de datos.
+
+    Raises:
+        HTTPException: 404 si no existe el usuario o la canción,
+            400 si el favorito ya existe
+    """
+    usuario_existe, cancion_existe = session.exec(
+        _SELECT_EXISTEN_USUARIO_CANCION,
+        params={"id_usuario": id_usuario, "id_cancion": id_cancion},
+    ).one()
+
+    if not usuario_existe:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado"
+        )
+
+    if not cancion_existe:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Canción no encontrada"
+        )
+
+    # Crear el favorito; la restricción única rechaza los duplicados (también
+    # los creados en paralelo) sin necesidad de consultarlos antes
+    try:
+        db_favorito = Favorito(id_usuario=id_usuario, id_cancion=id_cancion)
+        session.add(db_favorito)
+        session.commit()
+        return db_favorito
+    except IntegrityError as e:
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Esta canción ya está marcada como favorita para este usuario",
+        ) from e
+
+
+def _eliminar_favoritos(
+    session: Session, statement, params: dict[str, int] | None = None
+) -> None:
+    """
+    Ejecuta un DELETE de favoritos y confirma la transacción.
+
+    Raises:
+        HTTPException: 404 si el DELETE no eliminó ningún favorito
+    """
+    result = session.exec(statement, params=params)
+    if result.rowcount == 0:
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Favorito no encontrado"
+        )
+
+    session.commit()
+
 
 @router.get("/", response_model=list[FavoritoRead])
 def listar_favoritos(
-    *, session: Session = Depends(get_session), skip: int = 0, limit: int = 100
+    *,
+    session: Session = Depends(get_session),
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: int | None = None,
 ):
     """
     Listar todos los favoritos con paginación.
 
     - **skip**: número de registros a saltar (para paginación)
     - **limit**: máximo número de registros a retornar (máximo 100)
+    - **after_id**: paginación por cursor; retorna los favoritos con ID mayor a
+      este valor (en lugar de usar skip). El header X-Next-Cursor trae el
+      valor a usar para la siguiente página.
     """
     # Validar parámetros de paginación
     if limit > 100:
         limit = 100
 
-    favoritos = session.exec(select(Favorito).offset(skip).limit(limit)).all()
+    # Los listados repetidos se sirven desde la caché hasta que expiran o hasta
+    # la siguiente escritura en la base de datos
+    # _SELECT_FAVORITOS carga usuario y canción de todos los favoritos en dos
+    # queries adicionales en lugar de una por cada favorito (N+1)
+    favoritos = listados_cache.obtener(
+        ("favoritos", skip, limit, after_id),
+        lambda: paginar(
+            session, _SELECT_FAVORITOS, Favorito, FavoritoRead, skip, limit, after_id
+        ),
+    )
+    agregar_cursor(response, favoritos, after_id)
 
     return favoritos
 
@@ -41,42 +139,7 @@ def crear_favorito(
     - **id_usuario**: ID del usuario (requerido)
     - **id_cancion**: ID de la canción (requerido)
     """
-    # Verificar que el usuario existe
-    usuario = session.get(Usuario, favorito.id_usuario)
-    if not usuario:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado"
-        )
-
-    # Verificar que la canción existe
-    cancion = session.get(Cancion, favorito.id_cancion)
-    if not cancion:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Canción no encontrada"
-        )
-
-    # Verificar que no existe ya este favorito
-    favorito_existente = session.exec(
-        select(Favorito).where(
-            and_(
-                Favorito.id_usuario == favorito.id_usuario,
-                Favorito.id_cancion == favorito.id_cancion,
-            )
-        )
-    ).first()
-
-    if favorito_existente:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Esta canción ya está marcada como favorita para este usuario",
-        )
-
-    # Crear el favorito
-    db_favorito = Favorito.model_validate(favorito)
-    session.add(db_favorito)
-    session.commit()
-    session.refresh(db_favorito)
-    return db_favorito
+    return _crear_favorito(session, favorito.id_usuario, favorito.id_cancion)
 
 
 @router.get("/{favorito_id}", response_model=FavoritoRead)
@@ -97,14 +160,8 @@ def eliminar_favorito(*, session: Session = Depends(get_session), favorito_id: i
     """
     Eliminar un favorito (desmarcar como favorito).
     """
-    favorito = session.get(Favorito, favorito_id)
-    if not favorito:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Favorito no encontrado"
-        )
-
-    session.delete(favorito)
-    session.commit()
+    statement = delete(Favorito).where(Favorito.id == favorito_id)  # type: ignore
+    _eliminar_favoritos(session, statement)
 
 
 @router.post(
@@ -120,40 +177,7 @@ def marcar_favorito_especifico(
 
     Endpoint alternativo más específico para marcar favoritos.
     """
-    # Verificar que el usuario existe
-    usuario = session.get(Usuario, id_usuario)
-    if not usuario:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado"
-        )
-
-    # Verificar que la canción existe
-    cancion = session.get(Cancion, id_cancion)
-    if not cancion:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Canción no encontrada"
-        )
-
-    # Verificar que no existe ya este favorito
-    favorito_existente = session.exec(
-        select(Favorito).where(
-            and_(Favorito.id_usuario == id_usuario, Favorito.id_cancion == id_cancion)
-        )
-    ).first()
-
-    if favorito_existente:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Esta canción ya está marcada como favorita para este usuario",
-        )
-
-    # Crear el favorito
-    favorito_data = FavoritoCreate(id_usuario=id_usuario, id_cancion=id_cancion)
-    db_favorito = Favorito.model_validate(favorito_data)
-    session.add(db_favorito)
-    session.commit()
-    session.refresh(db_favorito)
-    return db_favorito
+    return _crear_favorito(session, id_usuario, id_cancion)
 
 
 @router.delete(
@@ -165,17 +189,8 @@ def eliminar_favorito_especifico(
     """
     Eliminar un favorito específico (desmarcar canción favorita de un usuario).
     """
-    # Buscar el favorito específico
-    favorito = session.exec(
-        select(Favorito).where(
-            and_(Favorito.id_usuario == id_usuario, Favorito.id_cancion == id_cancion)
-        )
-    ).first()
-
-    if not favorito:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Favorito no encontrado"
-        )
-
-    session.delete(favorito)
-    session.commit()
+    _eliminar_favoritos(
+        session,
+        _DELETE_FAVORITO_USUARIO_CANCION,
+        params={"id_usuario": id_usuario, "id_cancion": id_cancion},
+    )
@@ -3,10 +3,13 @@ Router para endpoints de usuarios.
 Maneja CRUD completo de usuarios: crear, leer, actualizar, eliminar.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import delete
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 
+from ..cache import listados_cache
 from ..database import get_session
 from ..models import (
     Usuario,
@@ -15,25 +18,46 @@ from ..models import (
     UsuarioRead,
     UsuarioUpdate,
 )
+from ..paginacion import agregar_cursor, paginar
 
 router = APIRouter()
 
+# Query base reutilizada por el listado; cada petición construye una copia
+# con su paginación (los Select de SQLAlchemy son inmutables)
+_SELECT_USUARIOS = select(Usuario)
+
 
 @router.get("/", response_model=list[UsuarioRead])
 def listar_usuarios(
-    *, session: Session = Depends(get_session), skip: int = 0, limit: int = 100
+    *,
+    session: Session = Depends(get_session),
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: int | None = None,
 ):
     """
     Listar todos los usuarios con paginación.
 
     - **skip**: número de registros a saltar (para paginación)
     - **limit**: máximo número de registros a retornar (máximo 100)
+    - **after_id**: paginación por cursor; retorna los usuarios con ID mayor a
+      este valor (en lugar de usar skip). El header X-Next-Cursor trae el
+      valor a usar para la siguiente página.
     """
     # Validar parámetros de paginación
     if limit > 100:
         limit = 100
 
-    usuarios = session.exec(select(Usuario).offset(skip).limit(limit)).all()
+    # Los listados repetidos se sirven desde la caché hasta que expiran o hasta
+    # la siguiente escritura en la base de datos
+    usuarios = listados_cache.obtener(
+        ("usuarios", skip, limit, after_id),
+        lambda: paginar(
+            session, _SELECT_USUARIOS, Usuario, UsuarioRead, skip, limit, after_id
+        ),
+    )
+    agregar_cursor(response, usuarios, after_id)
 
     return usuarios
 
@@ -50,7 +74,6 @@ def crear_usuario(*, session: Session = Depends(get_session), usuario: UsuarioCr
         db_usuario = Usuario.model_validate(usuario)
         session.add(db_usuario)
         session.commit()
-        session.refresh(db_usuario)
         return db_usuario
     except IntegrityError as e:
         session.rollback()
@@ -92,13 +115,10 @@ def actualizar_usuario(
         )
 
     # Actualizar solo los campos proporcionados
-    usuario_data = usuario_update.model_dump(exclude_unset=True)
+    # (el usuario ya está en la sesión desde session.get, no hace falta add)
+    usuario.sqlmodel_update(usuario_update.model_dump(exclude_unset=True))
 
     try:
-        for field, value in usuario_data.items():
-            setattr(usuario, field, value)
-
-        session.add(usuario)
         session.commit()
         session.refresh(usuario)
         return usuario
@@ -117,13 +137,15 @@ def eliminar_usuario(*, session: Session = Depends(get_session), usuario_id: int
 
     También eliminará todos sus favoritos asociados.
     """
-    usuario = session.get(Usuario, usuario_id)
-    if not usuario:
+    # Un solo DELETE; la base de datos elimina los favoritos con ON DELETE CASCADE
+    statement = delete(Usuario).where(Usuario.id == usuario_id)  # type: ignore
+    result = session.exec(statement)
+    if result.rowcount == 0:
+        session.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado"
         )
 
-    session.delete(usuario)
     session.commit()
 
 
@@ -134,7 +156,13 @@ def listar_favoritos_usuario(
     """
     Listar todas las canciones favoritas de un usuario.
     """
-    usuario = session.get(Usuario, usuario_id)
+    # Cargar los favoritos junto con el usuario para evitar la carga perezosa.
+    # session.get consulta primero el identity map por llave primaria.
+    usuario = session.get(
+        Usuario,
+        usuario_id,
+        options=[selectinload(Usuario.favoritos)],  # type: ignore
+    )
     if not usuario:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado"
@@ -0,0 +1,4 @@
+"""
+Datos iniciales de la base de datos en formato JSON.
+Los carga musica_bd.py para poblar la base de datos.
+"""
@@ -1,17 +1,47 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
+from starlette.routing import Route
 
 from app.config import get_settings
-from app.database import check_database_connection, create_db_and_tables
+from app.database import (
+    check_database_connection,
+    create_db_and_tables,
+    get_pool_checkedout,
+)
 from app.routers import canciones, favoritos, usuarios
 
 # Obtener configuración
 settings = get_settings()
 
+# Tiempo máximo (en segundos) para verificar la base de datos en el health check
+HEALTH_CHECK_DB_TIMEOUT = 2.0
+
+# Respuestas que solo dependen de la configuración: se construyen una vez al
+# cargar el módulo en lugar de en cada petición
+API_INFO = {
+    "message": f"Bienvenido a {settings.app_name}",
+    "version": settings.app_version,
+    "description": settings.description,
+    "developer": "Juan Alejandro Ramirez Sanchez",
+    "docs": "/docs",
+    "redoc": "/redoc",
+    "endpoints": {
+        "usuarios": "/api/usuarios",
+        "canciones": "/api/canciones",
+        "favoritos": "/api/favoritos",
+    },
+}
+
+HEALTH_INFO = {
+    "environment": settings.environment,
+    "version": settings.app_version,
+}
+
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
@@ -52,8 +82,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Comprimir con gzip las respuestas grandes (p. ej. los listados JSON)
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
 
 # Incluir los routers de usuarios, canciones y favoritos
 app.include_router(usuarios.router, prefix="/api/usuarios", tags=["Usuarios"])
@@ -63,14 +97,14 @@ app.include_router(favoritos.router, prefix="/api/favoritos", tags=["Favoritos"]
 # Montar archivos estáticos para el frontend
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-
-# Servir el frontend en la ruta raíz
-@app.get("/", tags=["Frontend"])
-async def serve_frontend():
-    """
-    Servir la aplicación frontend en la ruta raíz.
-    """
-    return FileResponse("static/index.html")
+# Servir el frontend en la ruta raíz: StaticFiles con html=True entrega
+# index.html directamente (con ETag/Last-Modified), sin pasar por un endpoint.
+# Se registra como ruta exacta y no como mount en "/" para no capturar las
+# rutas de la API que FastAPI redirige al agregar la barra final. Route acepta
+# una app ASGI como endpoint (add_route espera una función que reciba Request).
+app.router.routes.append(
+    Route("/", StaticFiles(directory="static", html=True), include_in_schema=False)
+)
 
 
 # Crear un endpoint de información de la API
@@ -80,19 +114,7 @@ async def api_info():
     Endpoint con información básica de la API.
     Retorna información básica y enlaces a la documentación.
     """
-    return {
-        "message": f"Bienvenido a {settings.app_name}",
-        "version": settings.app_version,
-        "description": settings.description,
-        "developer": "Juan Alejandro Ramirez Sanchez",
-        "docs": "/docs",
-        "redoc": "/redoc",
-        "endpoints": {
-            "usuarios": "/api/usuarios",
-            "canciones": "/api/canciones",
-            "favoritos": "/api/favoritos",
-        },
-    }
+    return API_INFO
 
 
 # Crear un endpoint de health check para monitoreo
@@ -102,14 +124,22 @@ async def health_check():
     Health check endpoint para verificar el estado de la API.
     Útil para sistemas de monitoreo y orquestación.
     """
-    # Verificar conexión a base de datos
-    db_status = "connected" if check_database_connection() else "disconnected"
+    # Verificar conexión a base de datos en un hilo aparte y con tiempo límite,
+    # para que una base de datos colgada no bloquee las sondas de monitoreo
+    try:
+        connected = await asyncio.wait_for(
+            asyncio.to_thread(check_database_connection),
+            timeout=HEALTH_CHECK_DB_TIMEOUT,
+        )
+        db_status = "connected" if connected else "disconnected"
+    except TimeoutError:
+        db_status = "timeout"
 
     return {
         "status": "healthy" if db_status == "connected" else "unhealthy",
         "database": db_status,
-        "environment": settings.environment,
-        "version": settings.app_version,
+        "db_connections_in_use": get_pool_checkedout(),
+        **HEALTH_INFO,
     }
 
 
@@ -1,192 +1,103 @@
 """
 Script para poblar la base de datos con datos iniciales.
-Añade 5 usuarios y 10 canciones con algunos favoritos de ejemplo.
+Añade 5 usuarios y 10 canciones con algunos favoritos de ejemplo, tomados de
+los archivos JSON de app/seed.
 """
 
-from sqlmodel import Session, select
+import hashlib
+import json
+import os
+import shutil
+import sys
+from importlib import resources
+from pathlib import Path
 
-from app.database import create_db_and_tables, engine
+from sqlalchemy import event, func, insert
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app import seed
+from app.database import configurar_sqlite, create_db_and_tables, engine
 from app.models import Cancion, Favorito, Usuario
 
+# Base de datos SQLite ya poblada que se copia en lugar de repetir los INSERT.
+# Se regenera cuando cambian los datos (app/seed), el script o el esquema
+# (models.py), detectado con el hash guardado junto a él en SEED_HASH.
+# Por defecto ambos viven en la raíz del proyecto (SEED_DIR).
+SEED_DIR = Path(__file__).parent
+SEED_TEMPLATE = "musica_seed.db"
+SEED_HASH = ".seed_hash"
+_ARCHIVOS_SEMILLA = (
+    Path(__file__),
+    Path(__file__).with_name("app") / "models.py",
+    *sorted((Path(__file__).with_name("app") / "seed").glob("*.json")),
+)
 
-def poblar_usuarios(session: Session) -> list[Usuario]:
-    """Crear 5 usuarios de ejemplo."""
-    usuarios = [
-        Usuario(nombre="Juan Alejandro Ramirez", correo="juan.ramirez@musica.com"),
-        Usuario(nombre="María García López", correo="maria.garcia@musica.com"),
-        Usuario(nombre="Carlos Rodríguez", correo="carlos.rodriguez@musica.com"),
-        Usuario(nombre="Ana Martín", correo="ana.martin@musica.com"),
-        Usuario(nombre="Luis Fernando Gómez", correo="luis.gomez@musica.com"),
-    ]
 
-    for usuario in usuarios:
-        session.add(usuario)
+def _cargar_semilla(nombre: str) -> list[dict]:
+    """Carga un archivo de datos iniciales de app/seed como lista de filas."""
+    return json.loads(resources.files(seed).joinpath(nombre).read_text("utf-8"))
 
-    session.commit()
 
-    # Refresh para obtener los IDs
-    for usuario in usuarios:
-        session.refresh(usuario)
-
-    print(f"✅ Creados {len(usuarios)} usuarios")
-    return usuarios
-
-
-def poblar_canciones(session: Session) -> list[Cancion]:
-    """Crear 10 canciones de ejemplo."""
-    canciones = [
-        Cancion(
-            titulo="Bohemian Rhapsody",
-            artista="Queen",
-            album="A Night at the Opera",
-            duracion=355,
-            año=1975,
-            genero="Rock",
-        ),
-        Cancion(
-            titulo="Hotel California",
-            artista="Eagles",
-            album="Hotel California",
-            duracion=391,
-            año=1976,
-            genero="Rock",
-        ),
-        Cancion(
-            titulo="Imagine",
-            artista="John Lennon",
-            album="Imagine",
-            duracion=183,
-            año=1971,
-            genero="Rock",
-        ),
-        Cancion(
-            titulo="Billie Jean",
-            artista="Michael Jackson",
-            album="Thriller",
-            duracion=294,
-            año=1982,
-            genero="Pop",
-        ),
-        Cancion(
-            titulo="Like a Rolling Stone",
-            artista="Bob Dylan",
-            album="Highway 61 Revisited",
-            duracion=369,
-            año=1965,
-            genero="Folk Rock",
-        ),
-        Cancion(
-            titulo="Smells Like Teen Spirit",
-            artista="Nirvana",
-            album="Nevermind",
-            duracion=301,
-            año=1991,
-            genero="Grunge",
-        ),
-        Cancion(
-            titulo="What's Going On",
-            artista="Marvin Gaye",
-            album="What's Going On",
-            duracion=232,
-            año=1971,
-            genero="Soul",
-        ),
-        Cancion(
-            titulo="Purple Haze",
-            artista="Jimi Hendrix",
-            album="Are You Experienced",
-            duracion=167,
-            año=1967,
-            genero="Rock",
-        ),
-        Cancion(
-            titulo="Good Vibrations",
-            artista="The Beach Boys",
-            album="Smiley Smile",
-            duracion=218,
-            año=1966,
-            genero="Pop",
-        ),
-        Cancion(
-            titulo="Respect",
-            artista="Aretha Franklin",
-            album="I Never Loved a Man the Way I Love You",
-            duracion=147,
-            año=1967,
-            genero="Soul",
-        ),
-    ]
+def poblar_usuarios(session: Session) -> dict[str, int]:
+    """Crear los usuarios de ejemplo. Retorna el ID de cada uno por correo."""
+    usuarios = _cargar_semilla("usuarios.json")
 
-    for cancion in canciones:
-        session.add(cancion)
+    # Un solo INSERT por lotes; los IDs vuelven con RETURNING en el orden de
+    # los datos, sin un SELECT por cada fila
+    statement = insert(Usuario).returning(Usuario.id, sort_by_parameter_order=True)  # type: ignore
+    ids = session.execute(statement, usuarios).scalars().all()
 
-    session.commit()
+    print(f"✅ Creados {len(ids)} usuarios")
+    return {usuario["correo"]: id_ for usuario, id_ in zip(usuarios, ids, strict=True)}
 
-    # Refresh para obtener los IDs
-    for cancion in canciones:
-        session.refresh(cancion)
 
-    print(f"✅ Creadas {len(canciones)} canciones")
-    return canciones
+def poblar_canciones(session: Session) -> dict[str, int]:
+    """Crear las canciones de ejemplo. Retorna el ID de cada una por título."""
+    canciones = _cargar_semilla("canciones.json")
+
+    # Un solo INSERT por lotes; los IDs vuelven con RETURNING en el orden de
+    # los datos, sin un SELECT por cada fila
+    statement = insert(Cancion).returning(Cancion.id, sort_by_parameter_order=True)  # type: ignore
+    ids = session.execute(statement, canciones).scalars().all()
+
+    print(f"✅ Creadas {len(ids)} canciones")
+    return {cancion["titulo"]: id_ for cancion, id_ in zip(canciones, ids, strict=True)}
 
 
 def poblar_favoritos(
-    session: Session, usuarios: list[Usuario], canciones: list[Cancion]
+    session: Session, usuarios: dict[str, int], canciones: dict[str, int]
 ):
-    """Crear algunos favoritos de ejemplo."""
+    """
+    Crear los favoritos de ejemplo a partir de los IDs creados.
+    En favoritos.json cada favorito se identifica por el correo del usuario y
+    el título de la canción, que se traducen con los mapas que retornan
+    poblar_usuarios y poblar_canciones.
+    """
     favoritos = [
-        # Juan le gustan las clásicas del rock
-        Favorito(
-            id_usuario=usuarios[0].id, id_cancion=canciones[0].id
-        ),  # Bohemian Rhapsody
-        Favorito(
-            id_usuario=usuarios[0].id, id_cancion=canciones[1].id
-        ),  # Hotel California
-        Favorito(id_usuario=usuarios[0].id, id_cancion=canciones[7].id),  # Purple Haze
-        # María prefiere soul y pop
-        Favorito(id_usuario=usuarios[1].id, id_cancion=canciones[3].id),  # Billie Jean
-        Favorito(
-            id_usuario=usuarios[1].id, id_cancion=canciones[6].id
-        ),  # What's Going On
-        Favorito(id_usuario=usuarios[1].id, id_cancion=canciones[9].id),  # Respect
-        # Carlos es fan de los clásicos
-        Favorito(id_usuario=usuarios[2].id, id_cancion=canciones[2].id),  # Imagine
-        Favorito(
-            id_usuario=usuarios[2].id, id_cancion=canciones[4].id
-        ),  # Like a Rolling Stone
-        # Ana le gusta el grunge y rock alternativo
-        Favorito(
-            id_usuario=usuarios[3].id, id_cancion=canciones[5].id
-        ),  # Smells Like Teen Spirit
-        Favorito(id_usuario=usuarios[3].id, id_cancion=canciones[7].id),  # Purple Haze
-        # Luis tiene gustos variados
-        Favorito(
-            id_usuario=usuarios[4].id, id_cancion=canciones[8].id
-        ),  # Good Vibrations
-        Favorito(
-            id_usuario=usuarios[4].id, id_cancion=canciones[0].id
-        ),  # Bohemian Rhapsody
+        {
+            "id_usuario": usuarios[fila["correo"]],
+            "id_cancion": canciones[fila["titulo"]],
+        }
+        for fila in _cargar_semilla("favoritos.json")
     ]
 
-    for favorito in favoritos:
-        session.add(favorito)
-
-    session.commit()
+    session.execute(insert(Favorito), favoritos)
     print(f"✅ Creados {len(favoritos)} favoritos")
 
 
 def verificar_datos(session: Session):
     """Verificar que los datos se crearon correctamente."""
-    # Contar usuarios
-    usuarios_count = len(session.exec(select(Usuario)).all())
+    # Contar usuarios, canciones y favoritos en una sola query
+    usuarios_count, canciones_count, favoritos_count = session.exec(
+        select(
+            *(
+                select(func.count()).select_from(modelo).scalar_subquery()
+                for modelo in (Usuario, Cancion, Favorito)
+            )
+        )
+    ).one()
     print(f"📊 Total usuarios en BD: {usuarios_count}")
-
-    # Contar canciones
-    canciones_count = len(session.exec(select(Cancion)).all())
     print(f"📊 Total canciones en BD: {canciones_count}")
-
-    # Contar favoritos
-    favoritos_count = len(session.exec(select(Favorito)).all())
     print(f"📊 Total favoritos en BD: {favoritos_count}")
 
     # Mostrar algunos ejemplos
@@ -201,28 +112,114 @@ def verificar_datos(session: Session):
         print(f"  - {usuario.nombre} ({usuario.correo})")
 
 
+def _hash_semilla() -> str:
+    """Hash del código que define los datos iniciales y el esquema."""
+    sha = hashlib.sha256()
+    for archivo in _ARCHIVOS_SEMILLA:
+        sha.update(archivo.read_bytes())
+    return sha.hexdigest()
+
+
+def crear_template(directorio: Path = SEED_DIR) -> Path:
+    """
+    Asegura que SEED_TEMPLATE exista en `directorio` y esté al día con los
+    datos iniciales. Solo se vuelve a poblar si cambió el hash de los archivos
+    de semilla.
+
+    Args:
+        directorio: Carpeta donde se guardan el template y su hash
+
+    Returns:
+        Path: Ruta del template
+    """
+    template = directorio / SEED_TEMPLATE
+    archivo_hash = directorio / SEED_HASH
+    hash_actual = _hash_semilla()
+    if (
+        template.exists()
+        and archivo_hash.exists()
+        and archivo_hash.read_text() == hash_actual
+    ):
+        return template
+
+    # Poblar un archivo temporal y reemplazar el template al final, para que
+    # otro proceso (p. ej. otro worker de pytest-xdist) nunca copie uno a medias
+    temporal = template.with_suffix(f".{os.getpid()}.tmp")
+    temporal.unlink(missing_ok=True)
+    template_engine = create_engine(f"sqlite:///{temporal}")
+    event.listen(template_engine, "connect", configurar_sqlite)
+    SQLModel.metadata.create_all(template_engine)
+    with Session(template_engine) as session:
+        usuarios = poblar_usuarios(session)
+        canciones = poblar_canciones(session)
+        poblar_favoritos(session, usuarios, canciones)
+        session.commit()
+    # WAL acelera el poblado, pero el modo queda guardado en el archivo y lo
+    # heredarían las copias: el template vuelve al journal normal y es el engine
+    # de la app quien decide si usar WAL (SQLITE_WAL)
+    with template_engine.connect() as connection:
+        connection.exec_driver_sql("PRAGMA journal_mode=DELETE")
+    template_engine.dispose()
+
+    os.replace(temporal, template)
+    archivo_hash.write_text(hash_actual)
+    return template
+
+
+def ensure_seeded_db(path: str | Path, directorio: Path = SEED_DIR):
+    """
+    Crea una base de datos SQLite con los datos iniciales en `path` copiando
+    el template de `directorio`, sin ejecutar los INSERT de nuevo.
+    """
+    shutil.copyfile(crear_template(directorio), path)
+
+
 def main():
     """Función principal para poblar la base de datos."""
     print("🚀 Iniciando población de la base de datos...")
 
+    # Una BD SQLite que aún no existe se crea copiando el template ya poblado
+    ruta_bd = engine.url.database
+    if (
+        engine.url.get_backend_name() == "sqlite"
+        and ruta_bd not in (None, "", ":memory:")
+        and not Path(ruta_bd).exists()
+    ):
+        ensure_seeded_db(ruta_bd)
+        print(f"✅ BD creada a partir del template {SEED_TEMPLATE}")
+        with Session(engine) as session:
+            print("\n📋 Resumen de datos creados:")
+            verificar_datos(session)
+        return
+
     # Crear tablas si no existen
     create_db_and_tables()
     print("✅ Tablas creadas/verificadas")
 
     with Session(engine) as session:
-        # Verificar si ya hay datos
-        existing_usuarios = session.exec(select(Usuario)).all()
-        if existing_usuarios:
-            print(f"⚠️  Ya existen {len(existing_usuarios)} usuarios en la BD")
+        # Verificar si ya hay datos (basta con encontrar un usuario)
+        hay_usuarios = session.exec(select(Usuario.id).limit(1)).first() is not None
+        if hay_usuarios:
+            # Sin terminal (p. ej. en CI) no se puede preguntar: no añadir datos
+            if not sys.stdin.isatty():
+                print("⚠️  La BD ya tiene datos, no se añade nada")
+                return
+
+            usuarios_count = session.exec(
+                select(func.count()).select_from(Usuario)
+            ).one()
+            print(f"⚠️  Ya existen {usuarios_count} usuarios en la BD")
             respuesta = input("¿Deseas continuar y añadir más datos? (s/n): ")
             if respuesta.lower() != "s":
                 print("❌ Operación cancelada")
                 return
 
-        # Poblar datos
+        # Poblar datos en una sola transacción: un único commit al final. Si algo
+        # falla antes, al cerrar la sesión se hace rollback de todo
         usuarios = poblar_usuarios(session)
         canciones = poblar_canciones(session)
         poblar_favoritos(session, usuarios, canciones)
+        session.commit()
 
         # Verificar resultados
         print("\n📋 Resumen de datos creados:")
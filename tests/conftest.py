@@ -0,0 +1,172 @@
+"""
+Fixtures compartidas por todos los archivos de tests.
+pytest carga este módulo una sola vez por sesión: el engine, las tablas y los
+clientes se crean una vez y cualquier archivo de tests puede usarlos.
+"""
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import Engine, event
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from app.cache import listados_cache
+from app.database import get_session
+from main import app
+from musica_bd import crear_template, ensure_seeded_db
+
+
+# Fixture para crear una base de datos en memoria para testing
+@pytest.fixture(name="engine", scope="session")
+def engine_fixture():
+    """
+    Crea el engine en memoria y las tablas una sola vez para toda la sesión
+    de pruebas. Con pytest-xdist (`pytest -n auto`) cada worker es un proceso
+    con su propia sesión, así que cada uno tiene su base de datos aislada.
+    """
+    # Crear engine en memoria (SQLite)
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+    # pysqlite no emite BEGIN/SAVEPOINT correctamente por sí solo: se desactiva
+    # su manejo de transacciones y SQLAlchemy emite el BEGIN
+    @event.listens_for(engine, "connect")
+    def _desactivar_transacciones_pysqlite(dbapi_connection, _connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _emitir_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    # Crear todas las tablas
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(name="seed_dir", scope="session")
+def seed_dir_fixture(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """
+    Carpeta temporal donde se crea el template con los datos iniciales, para no
+    escribir en la raíz del proyecto. Con pytest-xdist es la carpeta común a
+    todos los workers, así que el template se pobla una sola vez.
+    """
+    return tmp_path_factory.getbasetemp().parent
+
+
+@pytest.fixture(name="seeded_engine", scope="session")
+def seeded_engine_fixture(seed_dir: Path):
+    """
+    Engine en memoria con los datos iniciales de musica_bd.py, cargados desde
+    el template en disco con la API de backup de SQLite (copia página a página,
+    sin ejecutar los INSERT).
+    """
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    with engine.connect() as connection:
+        origen = sqlite3.connect(crear_template(seed_dir))
+        try:
+            origen.backup(connection.connection.dbapi_connection)  # type: ignore
+        finally:
+            origen.close()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(name="seeded_file_engine", scope="session")
+def seeded_file_engine_fixture(
+    tmp_path_factory: pytest.TempPathFactory, seed_dir: Path
+):
+    """
+    Engine sobre una copia en disco del template con los datos iniciales.
+    A diferencia de la BD en memoria, cada hilo obtiene su propia conexión del
+    pool, así que varias peticiones pueden leerla al mismo tiempo.
+    """
+    ruta = tmp_path_factory.mktemp("seed") / "musica.db"
+    ensure_seeded_db(ruta, seed_dir)
+    engine = create_engine(
+        f"sqlite:///{ruta}", connect_args={"check_same_thread": False}
+    )
+    yield engine
+    engine.dispose()
+
+
+@pytest_asyncio.fixture(name="async_client")
+async def async_client_fixture(seeded_file_engine: Engine):
+    """
+    Cliente asíncrono de solo lectura sobre los datos iniciales. Cada petición
+    usa su propia sesión, para poder lanzarlas concurrentemente.
+    """
+
+    def get_session_override():
+        with Session(seeded_file_engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_session_override
+    listados_cache.clear()
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture(name="session")
+def session_fixture(engine: Engine):
+    """
+    Crea una sesión de base de datos para cada test dentro de una transacción.
+    Los commits del test se hacen sobre un SAVEPOINT y al final se hace
+    rollback de todo, dejando la base de datos vacía para el siguiente test.
+    Como get_session, no expira los objetos al hacer commit.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+
+    # Crear sesión
+    with Session(
+        bind=connection,
+        join_transaction_mode="create_savepoint",
+        expire_on_commit=False,
+    ) as session:
+        yield session
+
+    transaction.rollback()
+    connection.close()
+
+
+# Fixture para el cliente de pruebas compartido
+@pytest.fixture(name="test_client", scope="session")
+def test_client_fixture():
+    """
+    Crea un único cliente de pruebas de FastAPI para toda la sesión de pruebas.
+    """
+    return TestClient(app)
+
+
+# Fixture para cliente de pruebas
+@pytest.fixture(name="client")
+def client_fixture(test_client: TestClient, session: Session):
+    """
+    Retorna el cliente de pruebas usando la sesión de test.
+    Solo cambia el override de get_session en cada test.
+    """
+
+    # Override de la dependencia get_session
+    def get_session_override():
+        return session
+
+    app.dependency_overrides[get_session] = get_session_override
+    # Cada test revierte su transacción: no reutilizar listados de otro test
+    listados_cache.clear()
+    yield test_client
+    app.dependency_overrides.clear()
@@ -3,57 +3,51 @@ Tests para la API de Música.
 Pruebas unitarias y de integración usando pytest.
 """
 
+import asyncio
+import time
+from types import MappingProxyType
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlmodel import Session, SQLModel, create_engine
-from sqlmodel.pool import StaticPool
+from httpx import AsyncClient
+from sqlalchemy import Engine, event, func
+from sqlmodel import Session, create_engine, select
 
-from app.database import get_session
+from app.cache import CacheTTL
+from app.config import get_settings
 from app.models import Cancion, Favorito, Usuario
-from main import app
+from musica_bd import ensure_seeded_db
 
 # =============================================================================
 # CONFIGURACIÓN DE FIXTURES
 # =============================================================================
 
-
-# Fixture para crear una base de datos en memoria para testing
-@pytest.fixture(name="session")
-def session_fixture():
-    """
-    Crea una sesión de base de datos en memoria para cada test.
-    Se limpia automáticamente después de cada test.
-    """
-    # Crear engine en memoria (SQLite)
-    engine = create_engine(
-        "sqlite:///:memory:",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
-
-    # Crear todas las tablas
-    SQLModel.metadata.create_all(engine)
-
-    # Crear sesión
-    with Session(engine) as session:
-        yield session
-
-
-# Fixture para cliente de pruebas
-@pytest.fixture(name="client")
-def client_fixture(session: Session):
-    """
-    Crea un cliente de pruebas de FastAPI con la sesión de test.
-    """
-
-    # Override de la dependencia get_session
-    def get_session_override():
-        return session
-
-    app.dependency_overrides[get_session] = get_session_override
-    client = TestClient(app)
-    yield client
-    app.dependency_overrides.clear()
+# Datos de las filas de prueba, construidos una sola vez al importar el módulo
+USUARIO_TEST_DATA = {"nombre": "Usuario Test", "correo": "usuario@test.com"}
+CANCION_TEST_DATA = {
+    "titulo": "Canción Test",
+    "artista": "Artista Test",
+    "album": "Album Test",
+    "duracion": 240,
+    "año": 2020,
+    "genero": "Rock",
+}
+
+# Cuerpos canónicos de los POST, de solo lectura para que ningún test los
+# modifique; se envían como dict(PAYLOAD) o se combinan con {**PAYLOAD, ...}
+USUARIO_PAYLOAD = MappingProxyType(
+    {"nombre": "Juan Pérez", "correo": "juan@example.com"}
+)
+CANCION_PAYLOAD = MappingProxyType(
+    {
+        "titulo": "Bohemian Rhapsody",
+        "artista": "Queen",
+        "album": "A Night at the Opera",
+        "duracion": 355,
+        "año": 1975,
+        "genero": "Rock",
+    }
+)
 
 
 # Fixture para crear usuarios de prueba
@@ -62,10 +56,9 @@ def usuario_test_fixture(session: Session):
     """
     Crea un usuario de prueba en la base de datos.
     """
-    usuario = Usuario(nombre="Usuario Test", correo="usuario@test.com")
+    usuario = Usuario(**USUARIO_TEST_DATA)
     session.add(usuario)
     session.commit()
-    session.refresh(usuario)
     return usuario
 
 
@@ -75,17 +68,9 @@ def cancion_test_fixture(session: Session):
     """
     Crea una cancion de prueba en la base de datos.
     """
-    cancion = Cancion(
-        titulo="Canción Test",
-        artista="Artista Test",
-        album="Album Test",
-        duracion=240,
-        año=2020,
-        genero="Rock",
-    )
+    cancion = Cancion(**CANCION_TEST_DATA)
     session.add(cancion)
     session.commit()
-    session.refresh(cancion)
     return cancion
 
 
@@ -100,7 +85,6 @@ def favorito_test_fixture(
     favorito = Favorito(id_usuario=usuario_test.id, id_cancion=cancion_test.id)
     session.add(favorito)
     session.commit()
-    session.refresh(favorito)
     return favorito
 
 
@@ -112,15 +96,16 @@ def favorito_test_fixture(
 class TestUsuarios:
     """Tests para los endpoints de usuarios."""
 
-    def test_listar_usuarios(self, client: TestClient):
+    @pytest.mark.asyncio
+    async def test_listar_usuarios(self, async_client: AsyncClient):
         """Test para GET /api/usuarios"""
-        response = client.get("/api/usuarios")
+        response = await async_client.get("/api/usuarios/")
         assert response.status_code == 200
-        assert isinstance(response.json(), list)
+        assert len(response.json()) == 5
 
     def test_crear_usuario(self, client: TestClient):
         """Test para POST /api/usuarios"""
-        usuario_data = {"nombre": "Juan Pérez", "correo": "juan@example.com"}
+        usuario_data = dict(USUARIO_PAYLOAD)
         response = client.post("/api/usuarios/", json=usuario_data)
         assert response.status_code == 201
         data = response.json()
@@ -134,25 +119,27 @@ class TestUsuarios:
     ):
         """Test para verificar que no se permiten correos duplicados"""
         usuario_data = {
-            "nombre": "Otro Usuario",
+            **USUARIO_PAYLOAD,
             "correo": usuario_test.correo,  # Mismo correo
         }
         response = client.post("/api/usuarios/", json=usuario_data)
         assert response.status_code == 400
         assert "correo electrónico ya está registrado" in response.json()["detail"]
 
-    def test_obtener_usuario(self, client: TestClient, usuario_test: Usuario):
+    @pytest.mark.asyncio
+    async def test_obtener_usuario(self, async_client: AsyncClient):
         """Test para GET /api/usuarios/{id}"""
-        response = client.get(f"/api/usuarios/{usuario_test.id}")
+        response = await async_client.get("/api/usuarios/1")
         assert response.status_code == 200
         data = response.json()
-        assert data["id"] == usuario_test.id
-        assert data["nombre"] == usuario_test.nombre
-        assert data["correo"] == usuario_test.correo
+        assert data["id"] == 1
+        assert data["nombre"] == "Juan Alejandro Ramirez"
+        assert data["correo"] == "juan.ramirez@musica.com"
 
-    def test_obtener_usuario_no_existe(self, client: TestClient):
+    @pytest.mark.asyncio
+    async def test_obtener_usuario_no_existe(self, async_client: AsyncClient):
         """Test para verificar error 404 con usuario inexistente"""
-        response = client.get("/api/usuarios/999")
+        response = await async_client.get("/api/usuarios/999")
         assert response.status_code == 404
         assert "Usuario no encontrado" in response.json()["detail"]
 
@@ -176,6 +163,27 @@ class TestUsuarios:
         response = client.get(f"/api/usuarios/{usuario_test.id}")
         assert response.status_code == 404
 
+    def test_eliminar_usuario_con_favoritos(
+        self, client: TestClient, session: Session, favorito_test: Favorito
+    ):
+        """Test para verificar que se eliminan en cascada los favoritos"""
+        favorito_id = favorito_test.id
+        response = client.delete(f"/api/usuarios/{favorito_test.id_usuario}")
+        assert response.status_code == 204
+
+        # La BD borró el favorito en cascada sin pasar por la sesión compartida
+        # del test; en la app cada petición abre una sesión nueva
+        session.expire_all()
+
+        response = client.get(f"/api/favoritos/{favorito_id}")
+        assert response.status_code == 404
+
+    def test_eliminar_usuario_no_existe(self, client: TestClient):
+        """Test para verificar error 404 al eliminar un usuario inexistente"""
+        response = client.delete("/api/usuarios/999")
+        assert response.status_code == 404
+        assert "Usuario no encontrado" in response.json()["detail"]
+
 
 # =============================================================================
 # TESTS DE canciónS
@@ -185,22 +193,83 @@ class TestUsuarios:
 class TestCanciones:
     """Tests para los endpoints de canciones."""
 
-    def test_listar_canciones(self, client: TestClient):
+    @pytest.mark.asyncio
+    async def test_listar_canciones(self, async_client: AsyncClient):
         """Test para GET /api/canciones"""
-        response = client.get("/api/canciones")
+        response = await async_client.get("/api/canciones/")
         assert response.status_code == 200
-        assert isinstance(response.json(), list)
+        assert len(response.json()) == 10
+
+    def test_listar_canciones_por_cursor(
+        self, client: TestClient, cancion_test: Cancion
+    ):
+        """Test para la paginación por cursor con after_id"""
+        response = client.get("/api/canciones?after_id=0&limit=1")
+        assert response.status_code == 200
+        assert [c["id"] for c in response.json()] == [cancion_test.id]
+        assert response.headers["X-Next-Cursor"] == str(cancion_test.id)
+
+        cursor = response.headers["X-Next-Cursor"]
+        response = client.get(f"/api/canciones?after_id={cursor}&limit=1")
+        assert response.status_code == 200
+        assert response.json() == []
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_listar_canciones_comprimido(self, client: TestClient):
+        """Test para verificar que los listados grandes se comprimen con gzip"""
+        for i in range(5):
+            cancion_data = {**CANCION_PAYLOAD, "titulo": f"Canción {i}"}
+            client.post("/api/canciones/", json=cancion_data)
+
+        response = client.get("/api/canciones/", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert len(response.json()) == 5
+
+    def test_listar_canciones_cache(
+        self, client: TestClient, engine: Engine, cancion_test: Cancion
+    ):
+        """Test para verificar que el listado se cachea y se invalida al escribir"""
+        consultas: list[str] = []
+
+        def registrar(_conn, _cursor, statement, *_args):
+            if statement.lstrip().upper().startswith("SELECT"):
+                consultas.append(statement)
+
+        event.listen(engine, "before_cursor_execute", registrar)
+        try:
+            response = client.get("/api/canciones/")
+            assert [c["id"] for c in response.json()] == [cancion_test.id]
+            assert consultas
+
+            # El mismo listado se sirve desde la caché sin consultar la BD
+            consultas.clear()
+            assert client.get("/api/canciones/").json() == response.json()
+            assert consultas == []
+
+            # Una escritura vacía la caché y el siguiente listado la incluye
+            response = client.post("/api/canciones/", json=dict(CANCION_PAYLOAD))
+            assert response.status_code == 201
+            consultas.clear()
+            assert len(client.get("/api/canciones/").json()) == 2
+            assert consultas
+        finally:
+            event.remove(engine, "before_cursor_execute", registrar)
+
+    def test_cache_no_guarda_resultados_anteriores_a_una_escritura(self):
+        """Test para verificar que un listado leído antes de un commit no se cachea"""
+        cache = CacheTTL(ttl=60)
+        generacion = cache.generacion  # El listado empieza a consultar la BD
+        cache.clear()  # Una escritura concurrente confirma y vacía la caché
+        cache.set("canciones", ["fila vieja"], generacion)
+        assert cache.get("canciones") is None
+
+        cache.set("canciones", ["fila nueva"], cache.generacion)
+        assert cache.get("canciones") == ["fila nueva"]
 
     def test_crear_cancion(self, client: TestClient):
         """Test para POST /api/canciones"""
-        cancion_data = {
-            "titulo": "Bohemian Rhapsody",
-            "artista": "Queen",
-            "album": "A Night at the Opera",
-            "duracion": 355,
-            "año": 1975,
-            "genero": "Rock",
-        }
+        cancion_data = dict(CANCION_PAYLOAD)
         response = client.post("/api/canciones/", json=cancion_data)
         assert response.status_code == 201
         data = response.json()
@@ -209,14 +278,15 @@ class TestCanciones:
         assert "id" in data
         assert "fecha_creacion" in data
 
-    def test_obtener_cancion(self, client: TestClient, cancion_test: Cancion):
+    @pytest.mark.asyncio
+    async def test_obtener_cancion(self, async_client: AsyncClient):
         """Test para GET /api/canciones/{id}"""
-        response = client.get(f"/api/canciones/{cancion_test.id}")
+        response = await async_client.get("/api/canciones/1")
         assert response.status_code == 200
         data = response.json()
-        assert data["id"] == cancion_test.id
-        assert data["titulo"] == cancion_test.titulo
-        assert data["artista"] == cancion_test.artista
+        assert data["id"] == 1
+        assert data["titulo"] == "Bohemian Rhapsody"
+        assert data["artista"] == "Queen"
 
     def test_actualizar_cancion(self, client: TestClient, cancion_test: Cancion):
         """Test para PUT /api/canciones/{id}"""
@@ -239,25 +309,44 @@ class TestCanciones:
         response = client.get(f"/api/canciones/{cancion_test.id}")
         assert response.status_code == 404
 
-    def test_buscar_canciones(self, client: TestClient, cancion_test: Cancion):
+    @pytest.mark.asyncio
+    async def test_buscar_canciones(self, async_client: AsyncClient):
         """Test para GET /api/canciones/buscar"""
-        # Buscar por título
-        response = client.get(f"/api/canciones/buscar?titulo={cancion_test.titulo}")
-        assert response.status_code == 200
-        data = response.json()
-        assert len(data) >= 1
-        assert data[0]["titulo"] == cancion_test.titulo
+        # Buscar por título, artista y año a la vez
+        titulo, artista, anio = await asyncio.gather(
+            async_client.get("/api/canciones/buscar?titulo=Bohemian"),
+            async_client.get("/api/canciones/buscar?artista=queen"),
+            async_client.get("/api/canciones/buscar?año=1971"),
+        )
+        assert [r.status_code for r in (titulo, artista, anio)] == [200] * 3
+        assert [c["titulo"] for c in titulo.json()] == ["Bohemian Rhapsody"]
+        assert [c["titulo"] for c in artista.json()] == ["Bohemian Rhapsody"]
+        assert len(anio.json()) == 2
+
+    @pytest.mark.asyncio
+    async def test_buscar_canciones_por_genero(self, async_client: AsyncClient):
+        """Test para verificar que el género se compara completo sin mayúsculas"""
+        completo, parcial = await asyncio.gather(
+            async_client.get("/api/canciones/buscar?genero=rock"),
+            async_client.get("/api/canciones/buscar?genero=Ro"),
+        )
+        assert completo.status_code == 200
+        assert {c["genero"] for c in completo.json()} == {"Rock"}
+        assert len(completo.json()) == 4
+
+        assert parcial.status_code == 200
+        assert parcial.json() == []
 
     def test_buscar_canciones_multiples_filtros(self, client: TestClient):
         """Test para búsqueda con múltiples parámetros"""
         # Crear una canción específica para buscar
         cancion_data = {
+            **CANCION_PAYLOAD,
             "titulo": "Stairway to Heaven",
             "artista": "Led Zeppelin",
             "album": "Led Zeppelin IV",
             "duracion": 482,
             "año": 1971,
-            "genero": "Rock",
         }
         client.post("/api/canciones/", json=cancion_data)
 
@@ -278,11 +367,23 @@ class TestCanciones:
 class TestFavoritos:
     """Tests para los endpoints de favoritos."""
 
-    def test_listar_favoritos(self, client: TestClient):
+    @pytest.mark.asyncio
+    async def test_listar_favoritos(self, async_client: AsyncClient):
         """Test para GET /api/favoritos"""
+        response = await async_client.get("/api/favoritos/")
+        assert response.status_code == 200
+        assert len(response.json()) == 12
+
+    def test_listar_favoritos_con_relaciones(
+        self, client: TestClient, favorito_test: Favorito
+    ):
+        """Test para verificar que el listado incluye usuario y canción"""
         response = client.get("/api/favoritos")
         assert response.status_code == 200
-        assert isinstance(response.json(), list)
+        data = response.json()
+        assert len(data) == 1
+        assert data[0]["usuario"]["id"] == favorito_test.id_usuario
+        assert data[0]["cancion"]["id"] == favorito_test.id_cancion
 
     def test_crear_favorito(
         self, client: TestClient, usuario_test: Usuario, cancion_test: Cancion
@@ -297,6 +398,22 @@ class TestFavoritos:
         assert "id" in data
         assert "fecha_marcado" in data
 
+    def test_crear_favorito_referencias_inexistentes(
+        self, client: TestClient, usuario_test: Usuario, cancion_test: Cancion
+    ):
+        """Test para verificar error 404 con usuario o canción inexistentes"""
+        response = client.post(
+            "/api/favoritos/", json={"id_usuario": 999, "id_cancion": cancion_test.id}
+        )
+        assert response.status_code == 404
+        assert "Usuario no encontrado" in response.json()["detail"]
+
+        response = client.post(
+            "/api/favoritos/", json={"id_usuario": usuario_test.id, "id_cancion": 999}
+        )
+        assert response.status_code == 404
+        assert "Canción no encontrada" in response.json()["detail"]
+
     def test_crear_favorito_duplicado(
         self, client: TestClient, usuario_test: Usuario, cancion_test: Cancion
     ):
@@ -324,6 +441,21 @@ class TestFavoritos:
         response = client.get(f"/api/favoritos/{favorito_test.id}")
         assert response.status_code == 404
 
+    def test_eliminar_favorito_especifico(
+        self, client: TestClient, favorito_test: Favorito
+    ):
+        """Test para DELETE /api/favoritos/{id_usuario}/canciones/{id_cancion}"""
+        url = (
+            f"/api/favoritos/{favorito_test.id_usuario}"
+            f"/canciones/{favorito_test.id_cancion}"
+        )
+        response = client.delete(url)
+        assert response.status_code == 204
+
+        # Verificar que ya no existe
+        response = client.delete(url)
+        assert response.status_code == 404
+
     def test_marcar_favorito_usuario(
         self, client: TestClient, usuario_test: Usuario, cancion_test: Cancion
     ):
@@ -336,6 +468,17 @@ class TestFavoritos:
         assert data["id_usuario"] == usuario_test.id
         assert data["id_cancion"] == cancion_test.id
 
+    def test_marcar_favorito_usuario_duplicado(
+        self, client: TestClient, favorito_test: Favorito
+    ):
+        """Test para verificar duplicados en el endpoint específico"""
+        response = client.post(
+            f"/api/favoritos/{favorito_test.id_usuario}"
+            f"/canciones/{favorito_test.id_cancion}"
+        )
+        assert response.status_code == 400
+        assert "ya está marcada como favorita" in response.json()["detail"]
+
     def test_listar_favoritos_usuario(
         self,
         client: TestClient,
@@ -361,23 +504,13 @@ class TestIntegracion:
     def test_flujo_completo(self, client: TestClient):
         """Test que verifica el flujo completo de la aplicación"""
         # 1. Crear usuario
-        usuario_data = {
-            "nombre": "Usuario Integración",
-            "correo": "integracion@test.com",
-        }
+        usuario_data = dict(USUARIO_PAYLOAD)
         response_usuario = client.post("/api/usuarios/", json=usuario_data)
         assert response_usuario.status_code == 201
         usuario = response_usuario.json()
 
         # 2. Crear canción
-        cancion_data = {
-            "titulo": "Canción Integración",
-            "artista": "Artista Integración",
-            "album": "Album Integración",
-            "duracion": 180,
-            "año": 2023,
-            "genero": "Pop",
-        }
+        cancion_data = dict(CANCION_PAYLOAD)
         response_cancion = client.post("/api/canciones/", json=cancion_data)
         assert response_cancion.status_code == 201
         cancion = response_cancion.json()
@@ -405,7 +538,7 @@ class TestValidacion:
     def test_email_invalido(self, client: TestClient):
         """Test para verificar validación de email"""
         usuario_data = {
-            "nombre": "Usuario Test",
+            **USUARIO_PAYLOAD,
             "correo": "email-invalido",  # Email sin formato válido
         }
         response = client.post("/api/usuarios/", json=usuario_data)
@@ -413,35 +546,143 @@ class TestValidacion:
 
     def test_año_cancion_invalido(self, client: TestClient):
         """Test para verificar validación de año"""
-        cancion_data = {
-            "titulo": "Canción Futura",
-            "artista": "Artista Futura",
-            "album": "Album Futuro",
-            "duracion": 240,
-            "año": 2030,  # Año futuro
-            "genero": "Futurista",
-        }
+        cancion_data = {**CANCION_PAYLOAD, "año": 2030}  # Año futuro
         response = client.post("/api/canciones/", json=cancion_data)
         assert response.status_code == 422  # Validation error
 
     def test_campos_requeridos(self, client: TestClient):
         """Test para verificar que los campos requeridos son obligatorios"""
         # Test sin nombre de usuario
-        usuario_data_incompleto = {
-            "correo": "test@example.com"
-            # Falta "nombre"
-        }
+        # Falta "nombre"
+        usuario_data_incompleto = {"correo": USUARIO_PAYLOAD["correo"]}
         response = client.post("/api/usuarios/", json=usuario_data_incompleto)
         assert response.status_code == 422
 
         # Test sin título de canción
+        # Falta "titulo"
         cancion_data_incompleto = {
-            "artista": "Artista Test",
-            "album": "Album Test",
-            "duracion": 240,
-            "año": 2020,
-            "genero": "Rock",
-            # Falta "titulo"
+            k: v for k, v in CANCION_PAYLOAD.items() if k != "titulo"
         }
         response = client.post("/api/canciones/", json=cancion_data_incompleto)
         assert response.status_code == 422
+
+
+# =============================================================================
+# TESTS DEL FRONTEND
+# =============================================================================
+
+
+class TestFrontend:
+    """Tests para la entrega del frontend."""
+
+    def test_servir_frontend(self, client: TestClient):
+        """Test para GET / (index.html)"""
+        response = client.get("/")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/html")
+        assert "etag" in response.headers
+
+
+# =============================================================================
+# TESTS DE INFORMACIÓN DE LA API
+# =============================================================================
+
+
+class TestApiInfo:
+    """Tests para el endpoint de información de la API."""
+
+    def test_api_info(self, client: TestClient):
+        """Test para GET /api"""
+        response = client.get("/api")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["version"] == get_settings().app_version
+        assert data["endpoints"]["usuarios"] == "/api/usuarios"
+
+
+# =============================================================================
+# TESTS DE HEALTH CHECK
+# =============================================================================
+
+
+class TestHealth:
+    """Tests para el endpoint de health check."""
+
+    def test_health_check(self, test_client: TestClient, engine: Engine, monkeypatch):
+        """Test para GET /health"""
+        # Verificar contra el engine de pruebas y no contra la BD de desarrollo.
+        # Sin el fixture session, la única conexión del StaticPool está libre
+        monkeypatch.setattr("app.database.engine", engine)
+        response = test_client.get("/health")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "healthy"
+        assert data["database"] == "connected"
+        # El engine en memoria usa StaticPool, que no lleva la cuenta
+        assert data["db_connections_in_use"] is None
+
+    def test_health_check_timeout(self, client: TestClient, monkeypatch):
+        """Test para verificar que una base de datos lenta no bloquea /health"""
+
+        def check_lento() -> bool:
+            time.sleep(0.5)
+            return True
+
+        monkeypatch.setattr("main.check_database_connection", check_lento)
+        monkeypatch.setattr("main.HEALTH_CHECK_DB_TIMEOUT", 0.05)
+        response = client.get("/health")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "unhealthy"
+        assert data["database"] == "timeout"
+
+
+# =============================================================================
+# TESTS DE DATOS INICIALES
+# =============================================================================
+
+
+class TestDatosIniciales:
+    """Tests para el template de la base de datos con los datos iniciales."""
+
+    def test_template_cargado_en_memoria(self, seeded_engine: Engine):
+        """Test para verificar que el backup carga todos los datos iniciales"""
+        with Session(seeded_engine) as session:
+            for modelo, total in ((Usuario, 5), (Cancion, 10), (Favorito, 12)):
+                count = session.exec(select(func.count()).select_from(modelo)).one()
+                assert count == total
+
+    def test_ensure_seeded_db(self, tmp_path, seed_dir):
+        """Test para verificar que se crea una BD poblada copiando el template"""
+        ruta = tmp_path / "musica.db"
+        ensure_seeded_db(ruta, seed_dir)
+
+        engine = create_engine(f"sqlite:///{ruta}")
+        with Session(engine) as session:
+            usuarios = session.exec(select(Usuario)).all()
+            assert len(usuarios) == 5
+        engine.dispose()
+
+
+# =============================================================================
+# TESTS DE CONFIGURACIÓN
+# =============================================================================
+
+
+class TestConfiguracion:
+    """Tests para la configuración de la aplicación."""
+
+    def test_get_settings_cacheado(self):
+        """Test para verificar que la configuración se construye una sola vez"""
+        antes = get_settings()
+        assert get_settings() is antes
+
+        # Al limpiar la caché se construye una configuración nueva, que a su vez
+        # queda cacheada
+        get_settings.cache_clear()
+        try:
+            despues = get_settings()
+            assert despues is not antes
+            assert get_settings() is despues
+        finally:
+            get_settings.cache_clear()